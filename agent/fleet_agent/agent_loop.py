@@ -33,7 +33,7 @@ from copilot.tools import Tool, ToolInvocation, ToolResult
 from copilot.session import PermissionRequestResult
 
 # Import existing modules for actual functionality
-from fleet_agent.rag import search as rag_search_impl
+from fleet_agent.rag import search as rag_search_impl, clear_search_cache
 from fleet_agent.mcp_clients import approval as mcp_approval, security_scan as mcp_security_scan
 from fleet_agent.patcher_fastapi import detect as detect_drift_impl, apply as apply_patches_impl
 from fleet_agent.github_ops import (
@@ -345,8 +345,12 @@ def create_tools() -> list[Tool]:
             return ToolResult(error="Repository not cloned. Call clone_repository first.")
         
         try:
-            req_path = ws / "requirements.txt"
-            req_text = req_path.read_text(encoding="utf-8") if req_path.exists() else ""
+            # Single open() instead of exists() + read: a missing file is the
+            # only case that maps to an empty scan.
+            try:
+                req_text = (ws / "requirements.txt").read_text(encoding="utf-8")
+            except FileNotFoundError:
+                req_text = ""
             result = mcp_security_scan(req_text)
             findings = result.get("findings", [])
             
@@ -527,23 +531,26 @@ def create_tools() -> list[Tool]:
                     "message": "No tests directory found - skipping"
                 }))
             
-            # Install dependencies (with timeout to prevent hanging)
+            # Install dependencies (with timeout to prevent hanging).
+            # Output is never read, so discard it instead of piping it back.
             subprocess.run(
                 ["python", "-m", "pip", "install", "-r", "requirements.txt", "--quiet"],
-                cwd=str(ws), check=False, capture_output=True, timeout=120
+                cwd=str(ws), check=False, timeout=120,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
             )
             
-            # Run tests
+            # Run tests (stderr folded into stdout: one pipe, one buffer)
             result = subprocess.run(
                 ["python", "-m", "pytest", "-q"],
-                cwd=str(ws), capture_output=True, text=True, timeout=120
+                cwd=str(ws), text=True, timeout=120,
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
             )
             
             return ToolResult(text_result_for_llm=json.dumps({
                 "success": True,
                 "passed": result.returncode == 0,
                 "skipped": False,
-                "output": (result.stdout + result.stderr)[:500],
+                "output": result.stdout[:500],
                 "message": "All tests passed" if result.returncode == 0 else "Some tests failed"
             }))
         except Exception as e:
@@ -1118,6 +1125,7 @@ def main():
     # Clear state files from previous runs
     clear_created_prs()
     clear_modified_files()
+    clear_search_cache()
 
     # Load repos
     repos_config = ROOT / "config" / "repos.json"
@@ -24,9 +24,13 @@ Usage:
 """
 
 from __future__ import annotations
+import re
 import subprocess
 from pathlib import Path
 
+# Matches a pull request URL in `gh pr create` output / error text
+_PR_URL_RE = re.compile(r'https://github\.com/[^/]+/[^/]+/pull/\d+')
+
 
 def _run(args: list[str], cwd: Path | None = None) -> str:
     """
@@ -198,11 +202,10 @@ def commit_all(repo: Path, msg: str) -> bool:
     Raises:
         RuntimeError: If commit fails for reasons other than empty changeset
     """
-    # Ensure .gitignore exists before staging
-    gitignore_added = ensure_gitignore(repo)
-    if gitignore_added:
-        # Stage the .gitignore first so it takes effect
-        _run(["git", "add", ".gitignore"], cwd=repo)
+    # Ensure .gitignore exists before staging. `git add -A` reads ignore
+    # rules from the working tree, so it takes effect (and is itself staged)
+    # without a separate `git add .gitignore` process spawn.
+    ensure_gitignore(repo)
     
     _run(["git", "add", "-A"], cwd=repo)
     try:
@@ -250,7 +253,6 @@ def open_pr(repo: Path, base: str, head: str, title: str, body: str, labels: lis
     Raises:
         RuntimeError: If PR creation fails and URL cannot be extracted
     """
-    import re
     print(f"[GITHUB_OPS] open_pr called: repo={repo}, head={head}", flush=True)
     # Try to create labels if they don't exist (ignore errors)
     for label in labels:
@@ -273,7 +275,7 @@ def open_pr(repo: Path, base: str, head: str, title: str, body: str, labels: lis
         
         # Check if PR already exists - extract URL from error message
         if "already exists" in error_msg.lower():
-            pr_match = re.search(r'https://github\.com/[^/]+/[^/]+/pull/\d+', error_msg)
+            pr_match = _PR_URL_RE.search(error_msg)
             if pr_match:
                 pr_url = pr_match.group(0)
                 print(f"[GITHUB_OPS] PR already exists, extracted URL: {pr_url}", flush=True)
@@ -290,7 +292,7 @@ def open_pr(repo: Path, base: str, head: str, title: str, body: str, labels: lis
                 retry_msg = str(retry_e)
                 # Also check for "already exists" on retry
                 if "already exists" in retry_msg.lower():
-                    pr_match = re.search(r'https://github\.com/[^/]+/[^/]+/pull/\d+', retry_msg)
+                    pr_match = _PR_URL_RE.search(retry_msg)
                     if pr_match:
                         return pr_match.group(0)
                 raise
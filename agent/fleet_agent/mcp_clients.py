@@ -13,6 +13,8 @@ This module provides thin wrappers that call MCP tools on two remote servers:
 1. **Change Management Server** (default port 4101)
    - evaluate_approval: required approvals based on CM-7 policy
    - assess_risk: risk level and SLA for changes
+   - assess_risk_batch: risk scores for many changes in one call
+   - evaluate_change: approvals and risk score in one call
 
 2. **Security Scan Server** (default port 4102)
    - scan_dependencies: CVE vulnerability scan
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 import os
 import re
@@ -16,7 +17,7 @@ from azure.search.documents.knowledgebases.models import (
     KnowledgeRetrievalOutputMode,
 )
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Hit:
     doc_id: str
     score: float
@@ -27,13 +28,26 @@ class Hit:
 _credential = None
 _token_provider = None
 
-def _get_token() -> str:
-    """Get Azure AD token using DefaultAzureCredential."""
-    global _credential, _token_provider
+def get_credential() -> DefaultAzureCredential:
+    """
+    Process-wide DefaultAzureCredential, created on first use.
+
+    Credential discovery probes env, managed identity, CLI, ... and caches
+    tokens per instance, so every Azure client in the process should share
+    this one instead of constructing its own.
+    """
+    global _credential
     if _credential is None:
         _credential = DefaultAzureCredential()
+    return _credential
+
+
+def _get_token() -> str:
+    """Get Azure AD token using the shared DefaultAzureCredential."""
+    global _token_provider
+    if _token_provider is None:
         _token_provider = get_bearer_token_provider(
-            _credential, "https://cognitiveservices.azure.com/.default"
+            get_credential(), "https://cognitiveservices.azure.com/.default"
         )
     return _token_provider()
 
@@ -71,12 +85,15 @@ def _get_kb_client() -> KnowledgeBaseRetrievalClient:
     return KnowledgeBaseRetrievalClient(
         endpoint=endpoint,
         knowledge_base_name=kb_name,
-        credential=DefaultAzureCredential(),
+        credential=get_credential(),
     )
 
 
-def _kb_reasoning_effort() -> object:
-    value = os.getenv("AZURE_AI_KB_REASONING_EFFORT", "low").strip().lower()
+def _kb_reasoning_effort_name() -> str:
+    return os.getenv("AZURE_AI_KB_REASONING_EFFORT", "low").strip().lower()
+
+
+def _kb_reasoning_effort(value: str) -> object:
     if value == "minimal":
         return KnowledgeRetrievalMinimalReasoningEffort()
     if value == "low":
@@ -162,20 +179,39 @@ def search(query: str, k: int = 4) -> list[Hit]:
             "Set AZURE_AI_SEARCH_ENDPOINT and AZURE_AI_KB_NAME."
         )
 
+    return list(_search_cached(query.strip(), k, _kb_reasoning_effort_name()))
+
+
+@lru_cache(maxsize=64)
+def _search_cached(query: str, k: int, effort: str) -> tuple[Hit, ...]:
+    """
+    Retrieve from the knowledge base, memoized per (query, k, effort).
+
+    The agent searches the same policy queries for every repository in a
+    run (and the patcher repeats its fixed policy queries per repo), so
+    only the first repo pays for the KB round trip. Failed retrievals
+    raise and are therefore never cached. Call ``clear_search_cache()``
+    at the start of each run so policy edits are picked up.
+    """
     client = _get_kb_client()
     request = KnowledgeBaseRetrievalRequest(
         messages=[
             KnowledgeBaseMessage(
                 role="user",
-                content=[KnowledgeBaseMessageTextContent(text=query.strip())],
+                content=[KnowledgeBaseMessageTextContent(text=query)],
             )
         ],
         include_activity=False,
         output_mode=KnowledgeRetrievalOutputMode.EXTRACTIVE_DATA,
-        retrieval_reasoning_effort=_kb_reasoning_effort(),
+        retrieval_reasoning_effort=_kb_reasoning_effort(effort),
     )
     result = client.retrieve(request)
-    return _extract_kb_hits(result, k)
+    return tuple(_extract_kb_hits(result, k))
+
+
+def clear_search_cache() -> None:
+    """Drop memoized knowledge base results (called at the start of each run)."""
+    _search_cached.cache_clear()
 
 
 def search_openai_vector_store_reference(query: str, k: int = 4) -> list[Hit]:
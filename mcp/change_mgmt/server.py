@@ -9,18 +9,24 @@ Now uses the Model Context Protocol (MCP) via FastMCP + SSE transport.
 MCP Tools:
     evaluate_approval  - Evaluate required approvals for a change
     assess_risk        - Calculate change risk score
+    assess_risk_batch  - Calculate risk scores for many changes
+    evaluate_change    - Approvals and risk score in one call
 
 Run:
     python server.py                          # default port 4101
     MCP_PORT=4101 python server.py            # explicit port
+    LOG_LEVEL=DEBUG python server.py          # log every tool call
 """
 
 import logging
 import json
+import os
+import re
+import time
 import structlog
-from datetime import datetime, timezone
 from enum import Enum
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 
 from mcp.server.fastmcp import FastMCP
 
@@ -31,14 +37,17 @@ structlog.configure(
         structlog.processors.add_log_level,
         structlog.processors.JSONRenderer(),
     ],
-    wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+    # Per-request events are logged at DEBUG; below the configured level the
+    # filtering logger's methods are no-ops and skip the processor chain.
+    wrapper_class=structlog.make_filtering_bound_logger(
+        getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
+    ),
     cache_logger_on_first_use=True,
 )
 log = structlog.get_logger()
 
 # Create the MCP server
-import os as _os
-_port = int(_os.getenv("MCP_PORT", "4101"))
+_port = int(os.getenv("MCP_PORT", "4101"))
 mcp = FastMCP("Change Management MCP Server", host="0.0.0.0", port=_port)
 
 # =============================================================================
@@ -63,61 +72,128 @@ class RiskLevel(str, Enum):
 # APPROVAL MATRIX CONFIGURATION (CM-7 Policy Implementation)
 # =============================================================================
 
-# High-impact services requiring SRE approval
-HIGH_IMPACT_SERVICES = {
-    "payments", "billing", "auth", "identity", "gateway", "core", "banking"
-}
+# High-impact services requiring SRE approval (matched as substrings)
+HIGH_IMPACT_SERVICES: Tuple[str, ...] = (
+    "payments", "billing", "auth", "identity", "gateway", "core", "banking",
+)
 
 # Sensitive file patterns requiring Security approval
-SECURITY_SENSITIVE_PATTERNS = [
+SECURITY_SENSITIVE_PATTERNS: Tuple[str, ...] = (
     "auth", "secret", "keyvault", "credential", "token", "key",
     "password", "cert", "ssl", "tls", "encrypt", "decrypt",
-    "oauth", "saml", "jwt", "identity", "permission", "rbac"
-]
+    "oauth", "saml", "jwt", "identity", "permission", "rbac",
+)
 
 # Infrastructure patterns requiring SRE approval
-INFRA_PATTERNS = [
+INFRA_PATTERNS: Tuple[str, ...] = (
     "docker", "kubernetes", "k8s", "helm", "terraform", "pulumi",
-    "deploy", "pipeline", "ci", "cd", ".github/workflows", "infra"
-]
+    "deploy", "pipeline", "ci", "cd", ".github/workflows", "infra",
+)
 
 # Database patterns requiring DBA review
-DATABASE_PATTERNS = [
-    "migration", "schema", "alembic", "sql", "database", "db", "model"
-]
+DATABASE_PATTERNS: Tuple[str, ...] = (
+    "migration", "schema", "alembic", "sql", "database", "db", "model",
+)
+
+# Review SLA (hours) per risk level
+SLA_HOURS: Dict[RiskLevel, int] = {
+    RiskLevel.LOW: 48,
+    RiskLevel.MEDIUM: 24,
+    RiskLevel.HIGH: 8,
+    RiskLevel.CRITICAL: 4,
+}
+
+# Pattern lists compiled once at import into single alternation regexes, so
+# each path is scanned in one pass by the C regex engine instead of a Python
+# loop over every pattern.
+def _compile_patterns(patterns: Sequence[str]) -> re.Pattern:
+    """Compile literal substring patterns into one alternation regex."""
+    return re.compile("|".join(re.escape(p) for p in patterns))
+
+_HIGH_IMPACT_RE = _compile_patterns(HIGH_IMPACT_SERVICES)
+_SENSITIVE_RE = _compile_patterns(SECURITY_SENSITIVE_PATTERNS)
+_INFRA_RE = _compile_patterns(INFRA_PATTERNS)
+_DATABASE_RE = _compile_patterns(DATABASE_PATTERNS)
+
+# Category bits reported by _scan_paths()
+_TOUCHES_SENSITIVE = 0x1   # CM-7.3
+_TOUCHES_INFRA = 0x2       # CM-7.4
+_TOUCHES_DATABASE = 0x4    # CM-7.5
+
+_CATEGORY_PATTERNS = (
+    (_TOUCHES_SENSITIVE, _SENSITIVE_RE),
+    (_TOUCHES_INFRA, _INFRA_RE),
+    (_TOUCHES_DATABASE, _DATABASE_RE),
+)
 
 # =============================================================================
 # BUSINESS LOGIC
 # =============================================================================
 
+# (epoch second, formatted "YYYY-MM-DDTHH:MM:SS") of the last timestamp built
+_ts_second: Tuple[int, str] = (-1, "")
+
+def _utc_now_iso() -> str:
+    """
+    Current UTC time as ISO-8601 with microseconds (``...T12:00:00.000000+00:00``).
+
+    Built from ``time.time_ns()`` instead of a timezone-aware datetime; the
+    date/time prefix is only re-formatted when the second changes, so most
+    calls just format the microseconds.
+    """
+    global _ts_second
+    ns = time.time_ns()
+    second = ns // 1_000_000_000
+    if second != _ts_second[0]:
+        _ts_second = (second, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second)))
+    return f"{_ts_second[1]}.{ns // 1_000 % 1_000_000:06d}+00:00"
+
+@lru_cache(maxsize=1024)
 def _is_high_impact_service(service: str) -> bool:
-    """Check if service is classified as high-impact (CM-7.2)."""
-    s_lower = service.lower()
-    return any(hi in s_lower for hi in HIGH_IMPACT_SERVICES)
-
-def _touches_sensitive_files(paths: List[str]) -> bool:
-    """Check if any paths touch security-sensitive files (CM-7.3)."""
-    paths_lower = [p.lower() for p in paths]
-    return any(
-        any(pattern in path for pattern in SECURITY_SENSITIVE_PATTERNS)
-        for path in paths_lower
-    )
+    """
+    Check if service is classified as high-impact (CM-7.2).
 
-def _touches_infrastructure(paths: List[str]) -> bool:
-    """Check if any paths touch infrastructure files (CM-7.4)."""
-    paths_lower = [p.lower() for p in paths]
-    return any(
-        any(pattern in path for pattern in INFRA_PATTERNS)
-        for path in paths_lower
-    )
+    Memoized: the fleet is a small, fixed set of service names that is
+    evaluated again for every approval and risk request.
+    """
+    return _HIGH_IMPACT_RE.search(service.lower()) is not None
 
-def _touches_database(paths: List[str]) -> bool:
-    """Check if any paths touch database/migration files (CM-7.5)."""
-    paths_lower = [p.lower() for p in paths]
-    return any(
-        any(pattern in path for pattern in DATABASE_PATTERNS)
-        for path in paths_lower
-    )
+def _scan_paths(paths: Sequence[str]) -> int:
+    """
+    Classify touched paths in one pass, returning a bitmask of
+    _TOUCHES_SENSITIVE | _TOUCHES_INFRA | _TOUCHES_DATABASE.
+
+    Paths are joined into one lowercased, newline-separated string. No
+    pattern contains a newline, so a match can never span two paths and
+    each category costs a single C-level regex scan over the whole change,
+    however many paths it touches.
+    """
+    paths_blob = "\n".join(paths).lower()
+    mask = 0
+    for bit, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(paths_blob):
+            mask |= bit
+    return mask
+
+@lru_cache(maxsize=4096)
+def _classify_change(service: str, paths_key: Tuple[str, ...]) -> Tuple[bool, int]:
+    """
+    Return (high_impact, touched-category bitmask) for a change.
+
+    Both tools are pure functions of the service and touched paths, and CI
+    re-evaluates the same changes repeatedly, so the classification is
+    memoized. ``paths_key`` must come from ``_paths_key()``.
+    """
+    return _is_high_impact_service(service), _scan_paths(paths_key)
+
+def _paths_key(paths: List[str]) -> Tuple[str, ...]:
+    """
+    Canonical cache key for a touched-path list.
+
+    Order-insensitive and deduplicated: a path listed twice cannot change
+    any category, so duplicates are dropped before they reach the scan.
+    """
+    return tuple(sorted(set(paths)))
 
 def _calculate_risk_level(
     high_impact: bool,
@@ -140,54 +216,122 @@ def _calculate_risk_level(
         return RiskLevel.MEDIUM
     return RiskLevel.LOW
 
+def _risk_level_for_score(score: int) -> RiskLevel:
+    """Map an assess_risk score (0-100+) onto a risk level."""
+    if score >= 70:
+        return RiskLevel.CRITICAL
+    elif score >= 50:
+        return RiskLevel.HIGH
+    elif score >= 25:
+        return RiskLevel.MEDIUM
+    return RiskLevel.LOW
+
 def _get_sla_hours(risk_level: RiskLevel) -> int:
     """Get SLA for review based on risk level."""
-    sla_map = {
-        RiskLevel.LOW: 48,
-        RiskLevel.MEDIUM: 24,
-        RiskLevel.HIGH: 8,
-        RiskLevel.CRITICAL: 4,
-    }
-    return sla_map[risk_level]
-
-# =============================================================================
-# MCP TOOLS
-# =============================================================================
+    return SLA_HOURS[risk_level]
 
-@mcp.tool()
-def evaluate_approval(
+def _assess_risk(
     service: str,
-    touched_paths: list[str] | None = None,
-    change_type: str = "compliance",
-    description: str = "",
-) -> str:
-    """
-    Evaluate required approvals for a change based on CM-7 policy.
+    touched_paths: List[str],
+    lines_added: int,
+    lines_removed: int,
+    has_tests: bool,
+    dependencies_changed: bool,
+) -> Dict[str, Any]:
+    """Score a single change; shared by assess_risk and assess_risk_batch."""
+    high_impact, touched = _classify_change(service, _paths_key(touched_paths))
 
-    Rules:
-    - High-impact services (payments/auth/billing) -> SRE-Prod required
-    - Security-sensitive file patterns -> Security team required
-    - Infrastructure changes -> SRE-Prod required
-    - Database/migration changes -> DBA review required
-    - Observability-only changes -> ServiceOwner sufficient
+    risk_factors: List[str] = []
+    mitigations: List[str] = []
+    score = 0
 
-    Args:
-        service: Service name (e.g. contoso-payments-api)
-        touched_paths: List of file paths modified
-        change_type: Type of change (feature, bugfix, security_patch, observability, infrastructure, compliance)
-        description: Change description
-    """
-    if touched_paths is None:
-        touched_paths = []
+    if high_impact:
+        score += 25
+        risk_factors.append("High-impact service")
+        mitigations.append("Require canary deployment")
+
+    if touched & _TOUCHES_SENSITIVE:
+        score += 25
+        risk_factors.append("Security-sensitive files modified")
+        mitigations.append("Security team review required")
+
+    total_lines = lines_added + lines_removed
+    if total_lines > 500:
+        score += 20
+        risk_factors.append(f"Large change ({total_lines} lines)")
+        mitigations.append("Consider splitting into smaller PRs")
+    elif total_lines > 200:
+        score += 10
+        risk_factors.append(f"Medium change ({total_lines} lines)")
+
+    if not has_tests:
+        score += 15
+        risk_factors.append("No tests included")
+        mitigations.append("Add unit tests before merge")
+
+    if dependencies_changed:
+        score += 10
+        risk_factors.append("Dependencies modified")
+        mitigations.append("Run security scan on new dependencies")
 
-    log.info("evaluating_approval", service=service, paths_count=len(touched_paths))
+    if touched & _TOUCHES_INFRA:
+        score += 15
+        risk_factors.append("Infrastructure changes")
+        mitigations.append("Validate in staging environment first")
+
+    return {
+        "risk_score": min(score, 100),
+        "risk_level": _risk_level_for_score(score).value,
+        "risk_factors": risk_factors if risk_factors else ["No significant risk factors identified"],
+        "mitigations_recommended": mitigations if mitigations else ["Standard review process sufficient"],
+    }
 
-    high_impact = _is_high_impact_service(service)
-    sensitive_files = _touches_sensitive_files(touched_paths)
-    infra_touched = _touches_infrastructure(touched_paths)
-    db_touched = _touches_database(touched_paths)
+
+# Fields an assess_risk_batch entry may carry (the assess_risk arguments)
+_BATCH_ENTRY_FIELDS = frozenset({
+    "service",
+    "touched_paths",
+    "lines_added",
+    "lines_removed",
+    "has_tests",
+    "dependencies_changed",
+})
+
+
+def _batch_entry_error(change: Any) -> Optional[str]:
+    """Why an assess_risk_batch entry can't be scored, or None if it is well-formed."""
+    if not isinstance(change, dict):
+        return "entry must be an object"
+    unknown = sorted(set(change) - _BATCH_ENTRY_FIELDS)
+    if unknown:
+        return f"unknown field(s): {', '.join(map(str, unknown))}"
+    service = change.get("service")
+    if not isinstance(service, str) or not service:
+        return "service is required"
+    paths = change.get("touched_paths")
+    if paths is not None and not (
+        isinstance(paths, list) and all(isinstance(p, str) for p in paths)
+    ):
+        return "touched_paths must be a list of strings"
+    for key in ("lines_added", "lines_removed"):
+        value = change.get(key, 0)
+        if not isinstance(value, int) or isinstance(value, bool):
+            return f"{key} must be an integer"
+    for key in ("has_tests", "dependencies_changed"):
+        if key in change and not isinstance(change[key], bool):
+            return f"{key} must be a boolean"
+    return None
+
+
+def _evaluate_approval(service: str, touched_paths: List[str]) -> Dict[str, Any]:
+    """Apply the CM-7 approval matrix; shared by evaluate_approval and evaluate_change."""
+    high_impact, touched = _classify_change(service, _paths_key(touched_paths))
+    sensitive_files = bool(touched & _TOUCHES_SENSITIVE)
+    infra_touched = bool(touched & _TOUCHES_INFRA)
+    db_touched = bool(touched & _TOUCHES_DATABASE)
 
     required_approvals: List[str] = []
+    # Each rule below appends a distinct sub-policy, so no dedup is needed
     policies_referenced: List[str] = ["CM-7"]
     rationale_parts: List[str] = []
 
@@ -218,26 +362,61 @@ def evaluate_approval(
         rationale_parts.append("Standard change with no elevated risk factors")
 
     risk_level = _calculate_risk_level(high_impact, sensitive_files, infra_touched, db_touched)
-    auto_merge_allowed = risk_level == RiskLevel.LOW and not high_impact
+    auto_merge_allowed = risk_level is RiskLevel.LOW and not high_impact
 
-    response = {
+    return {
         "required_approvals": required_approvals,
         "rationale": "; ".join(rationale_parts),
         "risk_level": risk_level.value,
         "auto_merge_allowed": auto_merge_allowed,
         "sla_hours": _get_sla_hours(risk_level),
-        "policies_referenced": list(set(policies_referenced)),
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "policies_referenced": policies_referenced,
     }
 
-    log.info(
+
+# =============================================================================
+# MCP TOOLS
+# =============================================================================
+
+@mcp.tool()
+def evaluate_approval(
+    service: str,
+    touched_paths: list[str] | None = None,
+    change_type: str = "compliance",
+    description: str = "",
+) -> str:
+    """
+    Evaluate required approvals for a change based on CM-7 policy.
+
+    Rules:
+    - High-impact services (payments/auth/billing) -> SRE-Prod required
+    - Security-sensitive file patterns -> Security team required
+    - Infrastructure changes -> SRE-Prod required
+    - Database/migration changes -> DBA review required
+    - Observability-only changes -> ServiceOwner sufficient
+
+    Args:
+        service: Service name (e.g. contoso-payments-api)
+        touched_paths: List of file paths modified
+        change_type: Type of change (feature, bugfix, security_patch, observability, infrastructure, compliance)
+        description: Change description
+    """
+    if touched_paths is None:
+        touched_paths = []
+
+    log.debug("evaluating_approval", service=service, paths_count=len(touched_paths))
+
+    response = _evaluate_approval(service, touched_paths)
+    response["timestamp"] = _utc_now_iso()
+
+    log.debug(
         "approval_evaluated",
         service=service,
-        approvals=required_approvals,
-        risk_level=risk_level.value,
+        approvals=response["required_approvals"],
+        risk_level=response["risk_level"],
     )
 
-    return json.dumps(response, indent=2)
+    return json.dumps(response)
 
 
 @mcp.tool()
@@ -264,84 +443,131 @@ def assess_risk(
     if touched_paths is None:
         touched_paths = []
 
-    log.info("assessing_risk", service=service)
+    log.debug("assessing_risk", service=service)
 
-    risk_factors: List[str] = []
-    mitigations: List[str] = []
-    score = 0
+    response = _assess_risk(
+        service,
+        touched_paths,
+        lines_added,
+        lines_removed,
+        has_tests,
+        dependencies_changed,
+    )
+    response["timestamp"] = _utc_now_iso()
 
-    if _is_high_impact_service(service):
-        score += 25
-        risk_factors.append("High-impact service")
-        mitigations.append("Require canary deployment")
+    return json.dumps(response)
 
-    if _touches_sensitive_files(touched_paths):
-        score += 25
-        risk_factors.append("Security-sensitive files modified")
-        mitigations.append("Security team review required")
 
-    total_lines = lines_added + lines_removed
-    if total_lines > 500:
-        score += 20
-        risk_factors.append(f"Large change ({total_lines} lines)")
-        mitigations.append("Consider splitting into smaller PRs")
-    elif total_lines > 200:
-        score += 10
-        risk_factors.append(f"Medium change ({total_lines} lines)")
+@mcp.tool()
+def assess_risk_batch(changes: list[dict]) -> str:
+    """
+    Calculate risk scores for many proposed changes in one call.
+    Used by fleet-wide sweeps instead of one assess_risk call per change.
 
-    if not has_tests:
-        score += 15
-        risk_factors.append("No tests included")
-        mitigations.append("Add unit tests before merge")
+    Args:
+        changes: List of objects with the same fields as assess_risk:
+                 service (str, required), touched_paths (list[str]),
+                 lines_added (int), lines_removed (int), has_tests (bool),
+                 dependencies_changed (bool). Omitted fields use the
+                 assess_risk defaults; unknown fields are rejected.
+
+    Malformed entries don't fail the batch: their slot holds
+    {"index", "error"} instead of an assessment.
+    """
+    log.debug("assessing_risk_batch", count=len(changes))
+
+    assessments: List[Dict[str, Any]] = []
+    for index, change in enumerate(changes):
+        error = _batch_entry_error(change)
+        if error:
+            log.warning("invalid_batch_entry", index=index, error=error)
+            assessments.append({"index": index, "error": error})
+            continue
+        assessments.append({
+            "service": change["service"],
+            **_assess_risk(
+                change["service"],
+                change.get("touched_paths") or [],
+                change.get("lines_added", 0),
+                change.get("lines_removed", 0),
+                change.get("has_tests", True),
+                change.get("dependencies_changed", False),
+            ),
+        })
 
-    if dependencies_changed:
-        score += 10
-        risk_factors.append("Dependencies modified")
-        mitigations.append("Run security scan on new dependencies")
+    response = {
+        "assessments": assessments,
+        "timestamp": _utc_now_iso(),
+    }
 
-    if _touches_infrastructure(touched_paths):
-        score += 15
-        risk_factors.append("Infrastructure changes")
-        mitigations.append("Validate in staging environment first")
+    return json.dumps(response)
 
-    if score >= 70:
-        risk_level = RiskLevel.CRITICAL
-    elif score >= 50:
-        risk_level = RiskLevel.HIGH
-    elif score >= 25:
-        risk_level = RiskLevel.MEDIUM
-    else:
-        risk_level = RiskLevel.LOW
+
+@mcp.tool()
+def evaluate_change(
+    service: str,
+    touched_paths: list[str] | None = None,
+    lines_added: int = 0,
+    lines_removed: int = 0,
+    has_tests: bool = True,
+    dependencies_changed: bool = False,
+) -> str:
+    """
+    Evaluate required approvals and risk score for a change in one call.
+    Returns the evaluate_approval result under "approval" and the
+    assess_risk result under "risk".
+
+    Args:
+        service: Service name
+        touched_paths: List of modified file paths
+        lines_added: Number of lines added
+        lines_removed: Number of lines removed
+        has_tests: Whether tests are included
+        dependencies_changed: Whether dependencies were modified
+    """
+    if touched_paths is None:
+        touched_paths = []
+
+    log.debug("evaluating_change", service=service, paths_count=len(touched_paths))
 
     response = {
-        "risk_score": min(score, 100),
-        "risk_level": risk_level.value,
-        "risk_factors": risk_factors if risk_factors else ["No significant risk factors identified"],
-        "mitigations_recommended": mitigations if mitigations else ["Standard review process sufficient"],
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "approval": _evaluate_approval(service, touched_paths),
+        "risk": _assess_risk(
+            service,
+            touched_paths,
+            lines_added,
+            lines_removed,
+            has_tests,
+            dependencies_changed,
+        ),
+        "timestamp": _utc_now_iso(),
     }
 
-    return json.dumps(response, indent=2)
+    return json.dumps(response)
 
 
 # =============================================================================
 # MCP RESOURCES  (lightweight read-only info exposed via MCP)
 # =============================================================================
 
+# Static part of the health payload; only the timestamp changes per call.
+_HEALTH_OK: Dict[str, Any] = {
+    "status": "ok",
+    "service": "change-mgmt-mcp",
+    "version": "1.0.0",
+}
+
+
 @mcp.resource("health://status")
 def healthz() -> str:
     """Health check - process is alive."""
-    return json.dumps({
-        "status": "ok",
-        "service": "change-mgmt-mcp",
-        "version": "1.0.0",
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-    })
+    return json.dumps({**_HEALTH_OK, "timestamp": _utc_now_iso()})
 
 
 @mcp.resource("health://ready")
 def readyz() -> str:
     """Readiness check - service ready to accept requests."""
+    cache = _classify_change.cache_info()
     return json.dumps({
         "status": "ready",
         "service": "change-mgmt-mcp",
@@ -349,8 +575,13 @@ def readyz() -> str:
         "checks": {
             "approval_matrix": "loaded",
             "policy_config": "valid",
+            "evaluation_cache": {
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "size": cache.currsize,
+            },
         },
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": _utc_now_iso(),
     })
 
 
@@ -4,6 +4,8 @@ Deploy Vector Store Script
 
 This script creates a vector store in Azure OpenAI and uploads all markdown files
 from the knowledge/ folder. It updates the .env file with the vector store ID.
+When an existing store is kept, only files whose content changed since the last
+deployment (tracked in agent/.deploy-manifest.json) are re-uploaded.
 
 Usage:
     python scripts/deploy-vector-store.py
@@ -13,28 +15,33 @@ Requirements:
     - openai and azure-identity packages installed
 """
 
+import hashlib
+import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from openai import AzureOpenAI
+from openai import APIError, AzureOpenAI, NotFoundError
 from azure.identity import DefaultAzureCredential, get_bearer_token_provider
 from dotenv import load_dotenv, set_key
 
 # Configuration
 KNOWLEDGE_FOLDER = PROJECT_ROOT / "knowledge"
 ENV_FILE = PROJECT_ROOT / "agent" / ".env"
+MANIFEST_FILE = ENV_FILE.parent / ".deploy-manifest.json"
 VECTOR_STORE_NAME = "fleet-compliance-knowledge"
+UPLOAD_CONCURRENCY = 8  # parallel file uploads (network-bound)
+
+load_dotenv(ENV_FILE)
 
 
 def get_azure_openai_client():
     """Create Azure OpenAI client with Azure AD authentication."""
-    load_dotenv(ENV_FILE)
-    
     endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
     if not endpoint:
         raise ValueError("AZURE_OPENAI_ENDPOINT not set in .env file")
@@ -56,11 +63,21 @@ def get_azure_openai_client():
 
 def get_existing_vector_store(client, name: str):
     """Check if a vector store with the given name already exists."""
-    vector_stores = client.vector_stores.list()
-    for vs in vector_stores.data:
-        if vs.name == name:
-            return vs
-    return None
+    # Fast path: the ID recorded in .env by a previous deployment
+    vs_id = os.getenv("AZURE_OPENAI_VECTOR_STORE_ID")
+    if vs_id:
+        try:
+            vs = client.vector_stores.retrieve(vs_id)
+            if vs.name == name:
+                return vs
+        except NotFoundError:
+            pass
+    
+    # Iterating the page auto-paginates lazily and stops at the first match
+    return next(
+        (vs for vs in client.vector_stores.list(limit=100) if vs.name == name),
+        None,
+    )
 
 
 def create_vector_store(client, name: str):
@@ -71,44 +88,163 @@ def create_vector_store(client, name: str):
     return vs
 
 
-def upload_files_to_vector_store(client, vector_store_id: str, folder: Path):
-    """Upload all markdown files from the folder to the vector store."""
-    md_files = list(folder.glob("*.md"))
+def list_markdown_files(folder: Path) -> list[Path]:
+    """List the markdown files directly inside the folder."""
+    with os.scandir(folder) as entries:
+        return [
+            Path(entry.path) for entry in entries
+            if entry.name.endswith(".md") and entry.is_file()
+        ]
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file's content."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def load_manifest() -> dict:
+    """Load the manifest of the last deployment, or an empty one."""
+    try:
+        return json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(vector_store_id: str, files: dict, pending_deletes: list[str] | None = None):
+    """
+    Record {filename: {sha256, file_id}} for the deployed vector store, plus
+    the IDs of outdated files that still have to be deleted.
+    """
+    manifest = {"vector_store_id": vector_store_id, "files": files}
+    if pending_deletes:
+        manifest["pending_deletes"] = pending_deletes
+    MANIFEST_FILE.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+def delete_file(client, vector_store_id: str, file_id: str) -> bool:
+    """Detach a file from the vector store and delete it; False on API errors."""
+    try:
+        try:
+            client.vector_stores.files.delete(file_id=file_id, vector_store_id=vector_store_id)
+        except NotFoundError:
+            pass  # already detached (e.g. removed in the portal)
+        try:
+            client.files.delete(file_id)
+        except NotFoundError:
+            pass
+    except APIError as e:
+        print(f"  ✗ Failed to delete {file_id}: {e}")
+        return False
+    return True
+
+
+def upload_files_to_vector_store(client, vector_store_id: str, md_files: list[Path]) -> dict:
+    """
+    Upload markdown files to the vector store.
+
+    Returns {filename: {sha256, file_id}} for the files the batch finished
+    processing; failed files are left out so the next sync retries them.
+    """
+    if not md_files:
+        return {}
+    
+    print(f"\nUploading {len(md_files)} files to vector store...")
+    for md_file in md_files:
+        print(f"  {md_file.name}")
+    
+    def upload(md_file: Path):
+        with open(md_file, "rb") as f:
+            return client.files.create(file=f, purpose="assistants").id
+    
+    # Upload concurrently, then attach everything as one batch and poll until
+    # processing finishes - no per-file attach calls or manual polling.
+    with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as pool:
+        file_ids = list(pool.map(upload, md_files))
+    batch = client.vector_stores.file_batches.create_and_poll(
+        vector_store_id=vector_store_id,
+        file_ids=file_ids,
+    )
+    
+    counts = batch.file_counts
+    print(f"  Completed: {counts.completed}, Failed: {counts.failed}")
+    
+    if counts.completed == len(file_ids):
+        completed = set(file_ids)
+    else:
+        completed = {
+            vs_file.id for vs_file in client.vector_stores.file_batches.list_files(
+                batch_id=batch.id,
+                vector_store_id=vector_store_id,
+                filter="completed",
+            )
+        }
     
+    return {
+        md_file.name: {"sha256": file_sha256(md_file), "file_id": file_id}
+        for md_file, file_id in zip(md_files, file_ids)
+        if file_id in completed
+    }
+
+
+def deploy_all(client, vector_store_id: str, folder: Path):
+    """Upload every markdown file into a fresh vector store."""
+    md_files = list_markdown_files(folder)
     if not md_files:
         print(f"No markdown files found in {folder}")
+    save_manifest(vector_store_id, upload_files_to_vector_store(client, vector_store_id, md_files))
+
+
+def sync_changed_files(client, vector_store_id: str, folder: Path):
+    """
+    Bring an existing vector store up to date with the folder.
+
+    Only new or modified files (by content hash) are uploaded; replaced and
+    removed files are deleted from the store. Skipped when the manifest was
+    written for a different store, since its file IDs would not apply.
+    """
+    manifest = load_manifest()
+    if manifest.get("vector_store_id") != vector_store_id:
+        print("  No deployment manifest for this vector store; skipping sync.")
         return
     
-    print(f"\nUploading {len(md_files)} files to vector store...")
+    deployed = manifest.get("files", {})
+    current = {md_file.name: md_file for md_file in list_markdown_files(folder)}
     
-    for md_file in md_files:
-        print(f"  Uploading: {md_file.name}")
-        
-        # Upload file to OpenAI
-        with open(md_file, "rb") as f:
-            file_obj = client.files.create(file=f, purpose="assistants")
-        
-        # Attach to vector store
-        client.vector_stores.files.create(
-            vector_store_id=vector_store_id,
-            file_id=file_obj.id
-        )
-        print(f"    ✓ Uploaded: {file_obj.id}")
-    
-    print("\nWaiting for files to be processed...")
-    
-    # Poll until all files are processed
-    import time
-    while True:
-        vs = client.vector_stores.retrieve(vector_store_id)
-        counts = vs.file_counts
-        
-        if counts.in_progress == 0:
-            print(f"  Completed: {counts.completed}, Failed: {counts.failed}")
-            break
-        
-        print(f"  In progress: {counts.in_progress}, Completed: {counts.completed}")
-        time.sleep(2)
+    changed = [
+        md_file for name, md_file in current.items()
+        if deployed.get(name, {}).get("sha256") != file_sha256(md_file)
+    ]
+    removed = [name for name in deployed if name not in current]
+    pending = manifest.get("pending_deletes", [])
+    
+    if not changed and not removed and not pending:
+        print("  ✓ All files up to date")
+        return
+    
+    uploaded = upload_files_to_vector_store(client, vector_store_id, changed)
+    
+    # Old versions of re-uploaded files, files no longer in the folder and
+    # deletes left over from the last run. A changed file whose upload failed
+    # keeps its old entry (and old content in the store) so the next sync
+    # retries it.
+    stale = list(pending)
+    stale += [deployed[name]["file_id"] for name in removed]
+    stale += [deployed[name]["file_id"] for name in uploaded if name in deployed]
+    
+    # Record the new uploads (and everything still to delete) before deleting
+    # anything, so an interrupted run neither re-uploads them nor loses track
+    # of the outdated file IDs
+    files = {name: entry for name, entry in deployed.items() if name in current}
+    files.update(uploaded)
+    save_manifest(vector_store_id, files, stale)
+    
+    failed = [file_id for file_id in stale if not delete_file(client, vector_store_id, file_id)]
+    save_manifest(vector_store_id, files, failed)
+    if len(stale) > len(failed):
+        print(f"  Removed {len(stale) - len(failed)} outdated files")
+    if failed:
+        print(f"  {len(failed)} deletes failed; they will be retried on the next sync")
 
 
 def update_env_file(vector_store_id: str):
@@ -144,15 +280,16 @@ def main():
             client.vector_stores.delete(existing_vs.id)
             print("  ✓ Deleted")
             vector_store = create_vector_store(client, VECTOR_STORE_NAME)
-            upload_files_to_vector_store(client, vector_store.id, KNOWLEDGE_FOLDER)
+            deploy_all(client, vector_store.id, KNOWLEDGE_FOLDER)
             update_env_file(vector_store.id)
         else:
             print("\nKeeping existing vector store.")
+            sync_changed_files(client, existing_vs.id, KNOWLEDGE_FOLDER)
             update_env_file(existing_vs.id)
     else:
         print("  Not found, creating new...")
         vector_store = create_vector_store(client, VECTOR_STORE_NAME)
-        upload_files_to_vector_store(client, vector_store.id, KNOWLEDGE_FOLDER)
+        deploy_all(client, vector_store.id, KNOWLEDGE_FOLDER)
         update_env_file(vector_store.id)
     
     print("\n" + "=" * 60)
@@ -12,14 +12,14 @@ from __future__ import annotations
 import asyncio
 import json
 import os
+import re
 import sys
 import time
+from collections import deque
 from contextlib import asynccontextmanager
 from dataclasses import dataclass, field, asdict
-from datetime import datetime
-from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 import subprocess
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
@@ -37,12 +37,29 @@ _agent_running: bool = False
 
 load_dotenv(AGENT_DIR / ".env")
 
+# Agent modules (importable now that AGENT_DIR is on sys.path)
+from azure.search.documents.knowledgebases import KnowledgeBaseRetrievalClient
+from copilot import CopilotClient
+from copilot.session import PermissionRequestResult
+from fleet_agent.agent_loop import (
+    SYSTEM_PROMPT,
+    clear_created_prs,
+    clear_modified_files,
+    create_tools,
+    get_created_prs,
+    get_modified_files,
+)
+from fleet_agent.github_ops import gh_auth_status
+from fleet_agent.rag import clear_search_cache, get_credential
+
 
 # =============================================================================
 # Event Types for WebSocket streaming
 # =============================================================================
 
-class EventType(str, Enum):
+class EventType:
+    """Wire names of WebSocket event types (plain strings, sent as-is)."""
+    
     # System events
     SYSTEM_STATUS = "system_status"
     AGENT_START = "agent_start"
@@ -70,16 +87,41 @@ class EventType(str, Enum):
     CHECKLIST_UPDATE = "checklist_update"
 
 
-@dataclass
+# (epoch second, formatted local "YYYY-MM-DDTHH:MM:SS") of the last timestamp
+_ts_second: tuple[int, str] = (-1, "")
+
+
+def _now_iso() -> str:
+    """
+    Local time as ISO-8601 with microseconds, same as datetime.now().isoformat().
+
+    The date/time prefix is only re-formatted when the second changes, so
+    bursts of events mostly just format the microseconds.
+    """
+    global _ts_second
+    ns = time.time_ns()
+    second = ns // 1_000_000_000
+    if second != _ts_second[0]:
+        _ts_second = (second, time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(second)))
+    return f"{_ts_second[1]}.{ns // 1_000 % 1_000_000:06d}"
+
+
+# Compact, UTF-8-native encoder for websocket frames. Emoji in log messages
+# go out as-is instead of 12-byte surrogate escapes, and there's no
+# whitespace after separators.
+_encode_frame = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+@dataclass(slots=True)
 class WSEvent:
     """WebSocket event structure."""
-    type: EventType
-    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    type: str
+    timestamp: str = field(default_factory=_now_iso)
     data: dict = field(default_factory=dict)
     
     def to_json(self) -> str:
-        return json.dumps({
-            "type": self.type.value,
+        return _encode_frame({
+            "type": self.type,
             "timestamp": self.timestamp,
             "data": self.data
         })
@@ -89,17 +131,18 @@ class WSEvent:
 # System Status Checker
 # =============================================================================
 
-def check_system_status() -> dict:
-    """Check if all required services are available."""
-    status = {
-        "github_cli": False,
-        "github_user": None,
-        "mcp_security": False,
-        "mcp_change_mgmt": False,
-        "knowledge_base": False,
-    }
-    
-    # Check GitHub CLI and get username
+# Status probes shell out to gh, open sockets and build Azure credentials, and
+# a page load asks for status several times (REST + WebSocket connect), so the
+# result is reused for a short TTL.
+STATUS_CACHE_TTL_SECONDS = 15.0
+_status_cache: Optional[tuple[float, dict]] = None
+
+# `gh auth status` line naming the signed-in account
+_GH_USER_RE = re.compile(r'Logged in to github\.com account ([^\s(]+)')
+
+
+def _check_github_cli() -> tuple[bool, Optional[str]]:
+    """Return (gh authenticated, GitHub username) from `gh auth status`."""
     try:
         result = subprocess.run(
             ["gh", "auth", "status"],
@@ -107,88 +150,224 @@ def check_system_status() -> dict:
             text=True,
             timeout=10
         )
-        status["github_cli"] = result.returncode == 0
+        if result.returncode != 0:
+            return False, None
         
-        # Extract username from output (format: "Logged in to github.com account USERNAME")
-        if result.returncode == 0:
-            import re
-            match = re.search(r'Logged in to github\.com account ([^\s(]+)', result.stdout + result.stderr)
-            if match:
-                status["github_user"] = match.group(1)
+        # Extract username from output (format: "Logged in to github.com account USERNAME").
+        # gh prints its status to stderr; stdout is only checked as a fallback.
+        match = _GH_USER_RE.search(result.stderr) or _GH_USER_RE.search(result.stdout)
+        return True, match.group(1) if match else None
     except:
-        pass
-    
-    # Check MCP servers
-    import socket
-    for name, port in [("mcp_security", 4102), ("mcp_change_mgmt", 4101)]:
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2)
-            result = sock.connect_ex(('localhost', port))
-            status[name] = result == 0
-            sock.close()
-        except:
-            pass
-    
-    # Check FoundryIQ Knowledge Base (Azure AI Search) connectivity
+        return False, None
+
+
+async def _check_port(port: int) -> bool:
+    """Return True if something is listening on localhost:port."""
+    # 127.0.0.1 rather than "localhost": the MCP servers bind IPv4, and
+    # resolving localhost can try ::1 first (notably on Windows).
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), 0.5)
+        writer.close()
+        await writer.wait_closed()
+        return True
+    except (OSError, asyncio.TimeoutError):
+        return False
+
+
+# Knowledge base client from the first successful status check, reused so
+# later checks skip credential discovery and client construction.
+_kb_status_client = None
+
+
+def _check_knowledge_base() -> bool:
+    """Check FoundryIQ Knowledge Base (Azure AI Search) connectivity."""
+    global _kb_status_client
+    if _kb_status_client is not None:
+        return True
+
     search_endpoint = os.getenv("AZURE_AI_SEARCH_ENDPOINT")
     kb_name = os.getenv("AZURE_AI_KB_NAME")
-    if search_endpoint and kb_name:
-        try:
-            from azure.identity import DefaultAzureCredential
-            from azure.search.documents.knowledgebases import KnowledgeBaseRetrievalClient
-
-            credential = DefaultAzureCredential()
-            # Construct the client — success means endpoint + credentials are valid
-            _client = KnowledgeBaseRetrievalClient(
-                endpoint=search_endpoint,
-                knowledge_base_name=kb_name,
-                credential=credential,
-            )
-            status["knowledge_base"] = True
-        except Exception as e:
-            print(f"[STATUS] Knowledge base check failed: {e}")
-            status["knowledge_base"] = False
+    if not (search_endpoint and kb_name):
+        return False
+    try:
+        # Construct the client — success means endpoint + credentials are valid
+        _kb_status_client = KnowledgeBaseRetrievalClient(
+            endpoint=search_endpoint,
+            knowledge_base_name=kb_name,
+            credential=get_credential(),
+        )
+        return True
+    except Exception as e:
+        print(f"[STATUS] Knowledge base check failed: {e}")
+        return False
+
+
+async def check_system_status(force: bool = False) -> dict:
+    """
+    Check if all required services are available.
+
+    The probes are independent, so they run concurrently (port probes on the
+    event loop, blocking probes in worker threads): the check takes as long
+    as the slowest probe and never blocks the event loop. Results are cached for STATUS_CACHE_TTL_SECONDS;
+    pass force=True to re-probe (explicit refresh from the UI).
+    """
+    global _status_cache
+    now = time.monotonic()
+    if not force and _status_cache and now - _status_cache[0] < STATUS_CACHE_TTL_SECONDS:
+        return dict(_status_cache[1])
+
+    (github_cli, github_user), mcp_security, mcp_change_mgmt, knowledge_base = await asyncio.gather(
+        asyncio.to_thread(_check_github_cli),
+        _check_port(4102),
+        _check_port(4101),
+        asyncio.to_thread(_check_knowledge_base),
+    )
+    status = {
+        "github_cli": github_cli,
+        "github_user": github_user,
+        "mcp_security": mcp_security,
+        "mcp_change_mgmt": mcp_change_mgmt,
+        "knowledge_base": knowledge_base,
+    }
     
-    return status
+    _status_cache = (now, status)
+    return dict(status)
+
+
+# (repos.json st_mtime_ns, parsed repo list) from the last read
+_repos_cache: Optional[tuple[int, list[dict]]] = None
 
 
 def get_fleet_repos() -> list[dict]:
-    """Load fleet repositories from config."""
+    """
+    Load fleet repositories from config.
+
+    The parsed list is cached until repos.json's mtime changes; each call
+    returns fresh dicts so callers can't mutate the cache.
+    """
+    global _repos_cache
     config_path = AGENT_DIR / "config" / "repos.json"
-    if config_path.exists():
+    try:
+        mtime_ns = config_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return []
+
+    if _repos_cache is None or _repos_cache[0] != mtime_ns:
         data = json.loads(config_path.read_text(encoding="utf-8"))
         repos = data.get("repos", [])
-        return [
+        _repos_cache = (mtime_ns, [
             {
                 "url": url,
                 "name": url.rstrip("/").split("/")[-1].removesuffix(".git"),
                 "status": "pending"
             }
             for url in repos
-        ]
-    return []
+        ])
+    return [dict(repo) for repo in _repos_cache[1]]
 
 
 # =============================================================================
 # Agent Wrapper with Event Streaming
 # =============================================================================
 
+# How long the sender waits for more events before flushing a frame. Tool
+# starts/completions emit several events back to back; they share one frame.
+EMIT_BATCH_WINDOW_SECONDS = 0.02
+
+# Outbox size beyond which console log lines are dropped (counted and reported)
+# while the client falls behind. State events are always queued.
+OUTBOX_MAX_EVENTS = 1024
+
+_PR_URL_RE = re.compile(r'https://github\.com/[^/]+/[^/]+/pull/\d+')
+
+# Attribute names the SDK has used for a tool call's id / name on tool events
+_CALL_ID_ATTRS = ('call_id', 'id', 'tool_call_id')
+_TOOL_NAME_ATTRS = ('tool_name', 'name', 'tool')
+
+# Attributes that may carry a tool's result on SDK completion events
+_TOOL_RESULT_ATTRS = (
+    'content', 'result', 'tool_result', 'text_result', 'output',
+    'textResultForLlm', 'text_result_for_llm', 'response', 'data',
+)
+
+
+def _first_attr(obj: object, names: tuple[str, ...]):
+    """Value of the first truthy attribute of obj among names, else None."""
+    for name in names:
+        value = getattr(obj, name, None)
+        if value:
+            return value
+    return None
+
+
+# Task prompt sent to the Copilot session; {repo_list} is one bullet per repo URL
+_AGENT_TASK_PROMPT = """Analyze and enforce compliance on these FastAPI repositories:
+
+{repo_list}
+
+For each repository:
+1. Search knowledge base for compliance policies (health endpoints, logging, security)
+2. Clone the repository
+3. Detect compliance drift
+4. Scan for security vulnerabilities
+5. Create a feature branch
+6. Apply compliance patches
+7. Get required approvals
+8. Run tests
+9. Commit and push changes
+10. Create a Pull Request with policy evidence in the description
+
+Process all repositories completely."""
+
+# Per-event trace output (SDK events, emitted frames, full payload dumps) is
+# only printed with LOG_LEVEL=DEBUG; lifecycle messages and errors always are.
+DEBUG_SDK_EVENTS = os.getenv("LOG_LEVEL", "INFO").upper() == "DEBUG"
+
+
+def _debug(message: str) -> None:
+    """Print a trace line when DEBUG_SDK_EVENTS is on."""
+    if DEBUG_SDK_EVENTS:
+        print(message, flush=True)
+
+
 class AgentEventEmitter:
     """Wraps agent execution and emits events to WebSocket."""
     
+    # Console message when a tool starts; callables format the tool arguments.
+    # rag_search is numbered per run and formatted in on_event.
+    _TOOL_START_LOGS: dict[str, str | Callable[[dict], str]] = {
+        "clone_repository": lambda args: f"📥 Cloning repository: {args.get('url', '').split('/')[-1]}",
+        "detect_compliance_drift": "🔍 Analyzing code for compliance drift...",
+        "security_scan": "🛡️ Starting security scan for CVE vulnerabilities...",
+        "create_branch": lambda args: f"🌿 Creating branch: {args.get('branch_name', 'compliance-fix')}",
+        "apply_compliance_patches": "🔧 Applying compliance patches...",
+        "get_required_approvals": "📋 Checking approval requirements (MCP)...",
+        "run_tests": "🧪 Starting pytest (this may take 30-60 seconds)...",
+        "commit_changes": lambda args: f"💾 Committing: {args.get('message', 'compliance fix')[:50]}",
+        "push_branch": "⬆️ Pushing branch to remote...",
+        "create_pull_request": lambda args: f"📝 Creating PR: {args.get('title', '')[:40]}...",
+    }
+    
+    # Console message when a tool completes (rag_search logs its query instead)
+    _TOOL_COMPLETE_LOGS: dict[str, str] = {
+        "clone_repository": "✅ Repository cloned",
+        "detect_compliance_drift": "✅ Compliance analysis complete",
+        "security_scan": "✅ Security scan complete",
+        "create_branch": "✅ Feature branch created",
+        "apply_compliance_patches": "✅ Compliance patches applied",
+        "get_required_approvals": "✅ Approval requirements retrieved",
+        "run_tests": "✅ Tests completed!",
+        "commit_changes": "✅ Changes committed",
+        "push_branch": "✅ Branch pushed to remote",
+        "create_pull_request": "🎉 Pull request created!",
+    }
+    
     def __init__(self, websocket: WebSocket):
         self.ws = websocket
+        self._outbox: deque[WSEvent] = deque()
+        self._sender: Optional[asyncio.Task] = None
+        self._dropped_logs = 0
         self.current_repo: Optional[str] = None
-        self.checklist = {
-            "rag_search": {"label": "Policy Knowledge Search", "status": "pending"},
-            "clone": {"label": "Clone Repository", "status": "pending"},
-            "detect_drift": {"label": "Detect Compliance Drift", "status": "pending"},
-            "security_scan": {"label": "Security Vulnerability Scan", "status": "pending"},
-            "apply_patches": {"label": "Apply Compliance Patches", "status": "pending"},
-            "run_tests": {"label": "Run Tests", "status": "pending"},
-            "create_pr": {"label": "Create Pull Request", "status": "pending"},
-        }
     
     def update_websocket(self, websocket: WebSocket):
         """Update the WebSocket reference (called on reconnection)."""
@@ -196,47 +375,93 @@ class AgentEventEmitter:
         print("[EMITTER] WebSocket reference updated", flush=True)
     
     async def emit(self, event: WSEvent):
-        """Send event to WebSocket."""
+        """Queue event for the WebSocket (sent in order by the sender task)."""
+        self._push(event)
+    
+    def _push(self, event: WSEvent):
+        """Append to the outbox and start the sender task if it isn't running."""
+        if event.type == EventType.CONSOLE_LOG and len(self._outbox) >= OUTBOX_MAX_EVENTS:
+            self._dropped_logs += 1
+            return
+        self._outbox.append(event)
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.get_running_loop().create_task(self._drain())
+    
+    async def _drain(self):
+        """Send queued events until the outbox is empty, one frame per batch."""
+        try:
+            while self._outbox:
+                await asyncio.sleep(EMIT_BATCH_WINDOW_SECONDS)
+                batch = list(self._outbox)
+                self._outbox.clear()
+                if self._dropped_logs:
+                    batch.append(self._log_event(
+                        f"{self._dropped_logs} log lines dropped (client falling behind)", "warning"
+                    ))
+                    self._dropped_logs = 0
+                await self._send_batch(batch)
+        except Exception as e:
+            # Never strand queued events behind a dead sender task
+            print(f"[EMIT] Sender failed: {e}", flush=True)
+            if self._outbox:
+                self._sender = asyncio.get_running_loop().create_task(self._drain())
+    
+    async def _send_batch(self, batch: list[WSEvent]):
+        """Serialize and send one batch; events that fail to serialize are skipped."""
+        encoded: list[str] = []
+        types: list[str] = []
+        for event in batch:
+            try:
+                encoded.append(event.to_json())
+            except Exception as e:
+                print(f"[EMIT] FAILED to serialize {event.type}: {e}", flush=True)
+                continue
+            types.append(event.type)
+        if not encoded:
+            return
+        
+        # Single events keep the plain object frame; bursts go as an array
+        frame = encoded[0] if len(encoded) == 1 else f"[{','.join(encoded)}]"
+        sent = ", ".join(types)
+        
         # Use global reference in case it was updated
-        global _active_websocket
         ws = _active_websocket or self.ws
         try:
-            json_data = event.to_json()
-            await ws.send_text(json_data)
-            print(f"[EMIT] Sent: {event.type.value}", flush=True)
+            await ws.send_text(frame)
+            _debug(f"[EMIT] Sent: {sent}")
         except Exception as e:
-            print(f"[EMIT] FAILED to send {event.type.value}: {e}", flush=True)
+            print(f"[EMIT] FAILED to send {sent}: {e}", flush=True)
     
     async def log(self, message: str, level: str = "info"):
         """Emit console log event."""
-        await self.emit(WSEvent(
+        self._push(self._log_event(message, level))
+    
+    def _log_event(self, message: str, level: str = "info") -> WSEvent:
+        return WSEvent(
             type=EventType.CONSOLE_LOG,
             data={"message": message, "level": level, "repo": self.current_repo}
-        ))
+        )
     
-    async def update_checklist(self, item: str, status: str, repo: str | None = None):
-        """Update checklist item status."""
+    def _checklist_event(self, item: str, status: str, repo: str | None = None) -> WSEvent:
+        """
+        Build a checklist delta for one item.
+
+        The frontend owns the per-repo checklist (labels and state); the
+        backend only reports status changes for the items in tool_checklist_map.
+        """
         # Use provided repo or fall back to current_repo
         target_repo = repo if repo is not None else self.current_repo
-        if item in self.checklist:
-            self.checklist[item]["status"] = status
-            await self.emit(WSEvent(
-                type=EventType.CHECKLIST_UPDATE,
-                data={"item": item, "status": status, "checklist": self.checklist, "repo": target_repo}
-            ))
+        return WSEvent(
+            type=EventType.CHECKLIST_UPDATE,
+            data={"item": item, "status": status, "repo": target_repo}
+        )
     
     async def run_agent(self, repos: list[str]):
         """Run the agent with event streaming."""
-        from fleet_agent.agent_loop import create_tools, SYSTEM_PROMPT, WORKSPACES, _workspace_registry, get_created_prs, clear_created_prs, clear_modified_files
-        from fleet_agent.github_ops import gh_auth_status
-        from copilot import CopilotClient
-        from copilot.tools import Tool, ToolResult
-        from copilot.session import PermissionRequestResult
-        import re
-        
         # Clear any previous tracking (file-based logs)
         clear_created_prs()
         clear_modified_files()
+        clear_search_cache()
         
         # Emit start
         await self.emit(WSEvent(
@@ -245,7 +470,8 @@ class AgentEventEmitter:
         ))
         
         await self.log("Verifying GitHub authentication...")
-        gh_auth_status()
+        # `gh auth status` is a subprocess; keep the loop free to flush frames
+        await asyncio.to_thread(gh_auth_status)
         await self.log("GitHub CLI authenticated", "success")
         
         # Get tools
@@ -255,23 +481,9 @@ class AgentEventEmitter:
         await self.log(f"Registered {len(tools)} custom tools")
         
         # Build user input
-        user_input = f"""Analyze and enforce compliance on these FastAPI repositories:
-
-{chr(10).join(f'• {url}' for url in repos)}
-
-For each repository:
-1. Search knowledge base for compliance policies (health endpoints, logging, security)
-2. Clone the repository
-3. Detect compliance drift
-4. Scan for security vulnerabilities
-5. Create a feature branch
-6. Apply compliance patches
-7. Get required approvals
-8. Run tests
-9. Commit and push changes
-10. Create a Pull Request with policy evidence in the description
-
-Process all repositories completely."""
+        user_input = _AGENT_TASK_PROMPT.format(
+            repo_list="\n".join(f"• {url}" for url in repos)
+        )
         
         # Start client
         client = CopilotClient()
@@ -289,17 +501,18 @@ Process all repositories completely."""
             
             # Track state
             done_event = asyncio.Event()
-            prs_created = []
+            prs_created: dict[str, None] = {}  # insertion-ordered set of PR URLs
             tool_call_count = 0
             
             # Capture running loop for thread-safe callback
             loop = asyncio.get_running_loop()
             
-            # Helper to emit WebSocket events directly from sync callback
-            # This bypasses the queue and emits immediately
-            def emit_now(coro):
-                """Schedule async emit to run immediately on event loop."""
-                asyncio.run_coroutine_threadsafe(coro, loop)
+            # Helper to emit WebSocket events from the sync callback: hands the
+            # event to the emitter's outbox on the loop thread (thread-safe,
+            # no coroutine/Task/Future per event)
+            def emit_now(event: WSEvent):
+                """Queue an event for the WebSocket from the SDK callback."""
+                loop.call_soon_threadsafe(self._push, event)
             
             # Tool to checklist mapping
             tool_checklist_map = {
@@ -321,45 +534,47 @@ Process all repositories completely."""
             # Track long-running tools for heartbeat messages
             long_running_tools = set()  # Set of tool names currently running that need heartbeats
             long_running_start_times = {}  # tool_name -> start_time
+            long_running_active = asyncio.Event()  # set while long_running_tools is non-empty
             
             def on_event(event):
                 nonlocal tool_call_count, thinking_logged
-                event_type = event.type.value if hasattr(event.type, 'value') else str(event.type)
-                print(f"[SDK EVENT] {event_type}", flush=True)
+                event_type = getattr(event.type, 'value', None) or str(event.type)
+                _debug(f"[SDK EVENT] {event_type}")
                 
                 # Show "thinking" status for intermediate events
                 if event_type in ("pending_messages.modified", "session.info", "user.message"):
                     if not thinking_logged:
-                        emit_now(self.log("Agent analyzing task and planning approach...", "info"))
+                        emit_now(self._log_event("Agent analyzing task and planning approach...", "info"))
                         thinking_logged = True
                     return
                 
                 if event_type == "assistant.message":
                     if hasattr(event.data, 'content') and event.data.content:
                         content = event.data.content
-                        print(f"[SDK] Assistant message: {content[:100]}...", flush=True)
+                        _debug(f"[SDK] Assistant message: {content[:100]}...")
                         
                         # Emit directly
-                        emit_now(self.emit(WSEvent(type=EventType.AGENT_MESSAGE, data={"content": content[:1000]})))
+                        emit_now(WSEvent(type=EventType.AGENT_MESSAGE, data={"content": content[:1000]}))
                         
                         # Extract PR URLs from assistant message and emit them
-                        pr_urls = re.findall(r'https://github\.com/[^/]+/[^/]+/pull/\d+', content)
+                        # (substring check first: most messages mention no PR)
+                        pr_urls = _PR_URL_RE.findall(content) if "/pull/" in content else ()
                         for url in pr_urls:
                             if url not in prs_created:
-                                prs_created.append(url)
-                                print(f"[SDK] Found PR URL in assistant message: {url}", flush=True)
-                                emit_now(self.emit(WSEvent(type=EventType.PR_CREATED, data={"repo": self.current_repo, "pr_url": url})))
-                                emit_now(self.log(f"🔗 PR created: {url}", "success"))
+                                prs_created[url] = None
+                                _debug(f"[SDK] Found PR URL in assistant message: {url}")
+                                emit_now(WSEvent(type=EventType.PR_CREATED, data={"repo": self.current_repo, "pr_url": url}))
+                                emit_now(self._log_event(f"🔗 PR created: {url}", "success"))
                 
                 elif event_type == "tool.execution_start":
                     tool_name = getattr(event.data, 'tool_name', 'unknown')
                     args = getattr(event.data, 'arguments', {})
                     # Track by call_id for completion lookup
-                    call_id = getattr(event.data, 'call_id', None) or getattr(event.data, 'id', None) or getattr(event.data, 'tool_call_id', None)
+                    call_id = _first_attr(event.data, _CALL_ID_ATTRS)
                     if call_id:
                         active_tool_calls[call_id] = tool_name
                     tool_call_count += 1
-                    print(f"[SDK] Tool start: {tool_name} (call_id={call_id})", flush=True)
+                    _debug(f"[SDK] Tool start: {tool_name} (call_id={call_id})")
                     
                     # Detect repo from clone
                     if tool_name == "clone_repository" and args.get("url"):
@@ -368,19 +583,19 @@ Process all repositories completely."""
                         if repo_name.endswith(".git"):
                             repo_name = repo_name[:-4]
                         self.current_repo = repo_name
-                        emit_now(self.emit(WSEvent(type=EventType.REPO_START, data={"repo": repo_name, "url": args["url"]})))
+                        emit_now(WSEvent(type=EventType.REPO_START, data={"repo": repo_name, "url": args["url"]}))
                     
                     # Emit tool call event directly
-                    emit_now(self.emit(WSEvent(type=EventType.TOOL_CALL_START, data={
+                    emit_now(WSEvent(type=EventType.TOOL_CALL_START, data={
                         "tool": tool_name,
                         "args": args,
                         "repo": self.current_repo,
                         "call_number": tool_call_count
-                    })))
+                    }))
                     
                     # Emit checklist update
                     if tool_name in tool_checklist_map:
-                        emit_now(self.update_checklist(tool_checklist_map[tool_name], "running", self.current_repo))
+                        emit_now(self._checklist_event(tool_checklist_map[tool_name], "running", self.current_repo))
                     
                     # Emit descriptive log based on tool type
                     # For rag_search, add a counter and store query for completion
@@ -389,42 +604,30 @@ Process all repositories completely."""
                         query_short = args.get('query', '')[:40]
                         if call_id:
                             rag_search_queries[call_id] = query_short
-                    
-                    tool_descriptions = {
-                        "rag_search": f"🔎 RAG #{rag_search_counter[0]}: {args.get('query', '')[:40]}...",
-                        "clone_repository": f"📥 Cloning repository: {args.get('url', '').split('/')[-1]}",
-                        "detect_compliance_drift": "🔍 Analyzing code for compliance drift...",
-                        "security_scan": "🛡️ Starting security scan for CVE vulnerabilities...",
-                        "create_branch": f"🌿 Creating branch: {args.get('branch_name', 'compliance-fix')}",
-                        "apply_compliance_patches": "🔧 Applying compliance patches...",
-                        "get_required_approvals": "📋 Checking approval requirements (MCP)...",
-                        "run_tests": "🧪 Starting pytest (this may take 30-60 seconds)...",
-                        "commit_changes": f"💾 Committing: {args.get('message', 'compliance fix')[:50]}",
-                        "push_branch": f"⬆️ Pushing branch to remote...",
-                        "create_pull_request": f"📝 Creating PR: {args.get('title', '')[:40]}...",
-                    }
-                    log_msg = tool_descriptions.get(tool_name, f"Tool: {tool_name}")
-                    emit_now(self.log(log_msg, "info"))
+                        log_msg = f"🔎 RAG #{rag_search_counter[0]}: {query_short}..."
+                    else:
+                        log_msg = self._TOOL_START_LOGS.get(tool_name)
+                        if log_msg is None:
+                            log_msg = f"Tool: {tool_name}"
+                        elif callable(log_msg):
+                            log_msg = log_msg(args)
+                    emit_now(self._log_event(log_msg, "info"))
                     
                     # Track long-running tools for heartbeat progress
                     if tool_name in ("run_tests", "apply_compliance_patches", "security_scan"):
                         long_running_tools.add(tool_name)
-                        long_running_start_times[tool_name] = time.time()
+                        long_running_start_times[tool_name] = time.monotonic()
+                        loop.call_soon_threadsafe(long_running_active.set)
                 
                 elif event_type == "tool.execution_complete":
                     # Look up tool name by call_id first, then try direct attributes
-                    call_id = getattr(event.data, 'call_id', None) or getattr(event.data, 'id', None) or getattr(event.data, 'tool_call_id', None)
+                    call_id = _first_attr(event.data, _CALL_ID_ATTRS)
                     tool_name = None
                     if call_id and call_id in active_tool_calls:
                         tool_name = active_tool_calls.pop(call_id)
                     if not tool_name:
-                        tool_name = (
-                            getattr(event.data, 'tool_name', None) or
-                            getattr(event.data, 'name', None) or
-                            getattr(event.data, 'tool', None) or
-                            'unknown'
-                        )
-                    print(f"[SDK] Tool complete: {tool_name} (call_id={call_id})", flush=True)
+                        tool_name = _first_attr(event.data, _TOOL_NAME_ATTRS) or 'unknown'
+                    _debug(f"[SDK] Tool complete: {tool_name} (call_id={call_id})")
                     
                     # Build completion event data
                     complete_data = {"tool": tool_name, "repo": self.current_repo}
@@ -433,99 +636,86 @@ Process all repositories completely."""
                     # (SDK events don't expose tool return values)
                     if tool_name == "apply_compliance_patches" and self.current_repo:
                         try:
-                            from fleet_agent.agent_loop import get_modified_files
                             modified = get_modified_files(self.current_repo)
                             if modified:
                                 complete_data["modified_files"] = modified
-                                print(f"[SDK] apply_compliance_patches modified (from file): {modified}", flush=True)
+                                _debug(f"[SDK] apply_compliance_patches modified (from file): {modified}")
                         except Exception as e:
                             print(f"[SDK] Could not read modified files: {e}", flush=True)
                     
-                    emit_now(self.emit(WSEvent(type=EventType.TOOL_CALL_COMPLETE, data=complete_data)))
+                    emit_now(WSEvent(type=EventType.TOOL_CALL_COMPLETE, data=complete_data))
                     
                     # Remove from long-running tracking
                     long_running_tools.discard(tool_name)
                     long_running_start_times.pop(tool_name, None)
+                    if not long_running_tools:
+                        loop.call_soon_threadsafe(long_running_active.clear)
                     
                     # Emit checklist update
                     if tool_name in tool_checklist_map:
-                        emit_now(self.update_checklist(tool_checklist_map[tool_name], "complete", self.current_repo))
+                        emit_now(self._checklist_event(tool_checklist_map[tool_name], "complete", self.current_repo))
                     
                     # Emit descriptive completion log
                     # For rag_search, include the query it searched for
                     if tool_name == "rag_search":
                         query_info = rag_search_queries.pop(call_id, "") if call_id else ""
                         short_query = query_info[:30] + "..." if len(query_info) > 30 else query_info
-                        emit_now(self.log(f"✅ Found: {short_query}", "success"))
+                        emit_now(self._log_event(f"✅ Found: {short_query}", "success"))
                     
-                    complete_descriptions = {
-                        "clone_repository": "✅ Repository cloned",
-                        "detect_compliance_drift": "✅ Compliance analysis complete",
-                        "security_scan": "✅ Security scan complete",
-                        "create_branch": "✅ Feature branch created",
-                        "apply_compliance_patches": "✅ Compliance patches applied",
-                        "get_required_approvals": "✅ Approval requirements retrieved",
-                        "run_tests": "✅ Tests completed!",
-                        "commit_changes": "✅ Changes committed",
-                        "push_branch": "✅ Branch pushed to remote",
-                        "create_pull_request": "🎉 Pull request created!",
-                    }
                     # Only log completion for tools that have a description (skips rag_search)
-                    log_msg = complete_descriptions.get(tool_name)
+                    log_msg = self._TOOL_COMPLETE_LOGS.get(tool_name)
                     if log_msg:
-                        emit_now(self.log(log_msg, "success"))
+                        emit_now(self._log_event(log_msg, "success"))
                     
                     # If PR created, mark repo complete and capture PR URL
                     if tool_name == "create_pull_request":
                         # Debug: dump ALL attributes and values
-                        print(f"[SDK] create_pull_request event.data type: {type(event.data)}", flush=True)
-                        print(f"[SDK] create_pull_request event.data attributes: {dir(event.data)}", flush=True)
-                        for attr in dir(event.data):
-                            if not attr.startswith('_'):
-                                try:
-                                    val = getattr(event.data, attr)
-                                    if not callable(val):
-                                        print(f"[SDK]   {attr} = {val}", flush=True)
-                                except:
-                                    pass
+                        if DEBUG_SDK_EVENTS:
+                            print(f"[SDK] create_pull_request event.data type: {type(event.data)}", flush=True)
+                            for attr in dir(event.data):
+                                if not attr.startswith('_'):
+                                    try:
+                                        val = getattr(event.data, attr)
+                                        if not callable(val):
+                                            print(f"[SDK]   {attr} = {val}", flush=True)
+                                    except Exception:
+                                        pass
                         
                         # Try multiple possible attribute names
                         tool_content = None
-                        for attr_name in ['content', 'result', 'tool_result', 'text_result', 'output', 
-                                          'textResultForLlm', 'text_result_for_llm', 'response', 'data']:
+                        for attr_name in _TOOL_RESULT_ATTRS:
                             val = getattr(event.data, attr_name, None)
                             if val:
                                 tool_content = val
-                                print(f"[SDK] Found content in '{attr_name}': {val}", flush=True)
+                                _debug(f"[SDK] Found content in '{attr_name}': {val}")
                                 break
                         
                         pr_url = None
                         if tool_content:
                             try:
-                                import json as json_mod
                                 if isinstance(tool_content, str):
-                                    data = json_mod.loads(tool_content)
+                                    data = json.loads(tool_content)
                                 else:
                                     data = tool_content
                                 if isinstance(data, dict):
                                     pr_url = data.get("pr_url") or data.get("url") or data.get("html_url")
-                                    print(f"[SDK] Extracted PR URL from JSON: {pr_url}", flush=True)
+                                    _debug(f"[SDK] Extracted PR URL from JSON: {pr_url}")
                             except Exception as e:
-                                print(f"[SDK] JSON parse failed: {e}, trying regex", flush=True)
+                                _debug(f"[SDK] JSON parse failed: {e}, trying regex")
                                 # Try regex extraction as fallback
-                                pr_match = re.search(r'https://github\.com/[^/]+/[^/]+/pull/\d+', str(tool_content))
+                                pr_match = _PR_URL_RE.search(str(tool_content))
                                 if pr_match:
                                     pr_url = pr_match.group(0)
-                                    print(f"[SDK] Extracted PR URL from regex: {pr_url}", flush=True)
+                                    _debug(f"[SDK] Extracted PR URL from regex: {pr_url}")
                         
                         if pr_url and pr_url not in prs_created:
-                            prs_created.append(pr_url)
-                            emit_now(self.emit(WSEvent(type=EventType.PR_CREATED, data={"repo": self.current_repo, "pr_url": pr_url})))
-                            emit_now(self.log(f"🔗 PR created: {pr_url}", "success"))
+                            prs_created[pr_url] = None
+                            emit_now(WSEvent(type=EventType.PR_CREATED, data={"repo": self.current_repo, "pr_url": pr_url}))
+                            emit_now(self._log_event(f"🔗 PR created: {pr_url}", "success"))
                         else:
-                            print(f"[SDK] No PR URL found in tool result", flush=True)
+                            _debug("[SDK] No PR URL found in tool result")
                         
-                        emit_now(self.emit(WSEvent(type=EventType.REPO_COMPLETE, data={"repo": self.current_repo})))
+                        emit_now(WSEvent(type=EventType.REPO_COMPLETE, data={"repo": self.current_repo}))
                 
                 elif event_type == "session.idle":
                     print("[SDK] Session idle - done", flush=True)
@@ -533,7 +723,7 @@ Process all repositories completely."""
                 
                 elif event_type in ("error", "session.error"):
                     print(f"[SDK] Error: {event.data}", flush=True)
-                    emit_now(self.log(f"Error: {event.data}", "error"))
+                    emit_now(self._log_event(f"Error: {event.data}", "error"))
                     done_event.set()
             
             # Heartbeat task for long-running tools (emits directly)
@@ -542,13 +732,14 @@ Process all repositories completely."""
                 last_emit_time = {}  # tool_name -> last emit timestamp
                 
                 while not done_event.is_set():
-                    await asyncio.sleep(5)  # Check every 5 seconds
+                    # Sleep until a long-running tool starts, then check every 5 seconds
+                    await long_running_active.wait()
+                    await asyncio.sleep(5)
                     
-                    for tool_name in list(long_running_tools):
-                        if tool_name not in long_running_start_times:
-                            continue
-                        
-                        elapsed = int(time.time() - long_running_start_times[tool_name])
+                    now = time.monotonic()
+                    # Snapshot: the SDK callback may add/remove tools meanwhile
+                    for tool_name, started in list(long_running_start_times.items()):
+                        elapsed = int(now - started)
                         last = last_emit_time.get(tool_name, 0)
                         
                         # Only emit every 10 seconds
@@ -589,13 +780,13 @@ Process all repositories completely."""
             await session.destroy()
             
             # Check created_prs from file (tool handler writes PRs there)
-            file_prs = get_created_prs()
-            print(f"[SDK] Checking created_prs from file: {file_prs}", flush=True)
+            file_prs = await asyncio.to_thread(get_created_prs)
+            _debug(f"[SDK] Checking created_prs from file: {file_prs}")
             for pr_info in file_prs:
                 pr_url = pr_info.get("pr_url")
-                print(f"[SDK] Found PR in file: {pr_url}", flush=True)
+                _debug(f"[SDK] Found PR in file: {pr_url}")
                 if pr_url and pr_url not in prs_created:
-                    prs_created.append(pr_url)
+                    prs_created[pr_url] = None
                     await self.emit(WSEvent(type=EventType.PR_CREATED, data={"repo": self.current_repo, "pr_url": pr_url}))
                     await self.log(f"🔗 PR created: {pr_url}", "success")
             
@@ -604,7 +795,7 @@ Process all repositories completely."""
                 type=EventType.AGENT_COMPLETE,
                 data={
                     "tool_calls": tool_call_count,
-                    "prs_created": prs_created,
+                    "prs_created": list(prs_created),
                     "repos_processed": len(repos)
                 }
             ))
@@ -645,9 +836,9 @@ app.add_middleware(
 
 
 @app.get("/api/status")
-async def get_status():
-    """Get system status."""
-    return check_system_status()
+async def get_status(refresh: bool = False):
+    """Get system status (``?refresh=true`` bypasses the status cache)."""
+    return await check_system_status(force=refresh)
 
 
 @app.get("/api/repos")
@@ -678,7 +869,7 @@ async def websocket_agent(websocket: WebSocket):
     
     try:
         # Send initial status
-        status = check_system_status()
+        status = await check_system_status()
         await emitter.emit(WSEvent(
             type=EventType.SYSTEM_STATUS,
             data=status
@@ -688,7 +879,7 @@ async def websocket_agent(websocket: WebSocket):
         while True:
             data = await websocket.receive_text()
             message = json.loads(data)
-            print(f"[WS] Received message: {message}", flush=True)
+            _debug(f"[WS] Received message: {message}")
             
             if message.get("action") == "start":
                 repos = message.get("repos", [])
@@ -721,7 +912,7 @@ async def websocket_agent(websocket: WebSocket):
                     ))
             
             elif message.get("action") == "status":
-                status = check_system_status()
+                status = await check_system_status()
                 await emitter.emit(WSEvent(
                     type=EventType.SYSTEM_STATUS,
                     data=status
@@ -738,4 +929,5 @@ async def websocket_agent(websocket: WebSocket):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Frames are small JSON events to a local UI; zlib would cost more than it saves
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_per_message_deflate=False)
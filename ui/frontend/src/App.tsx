@@ -269,9 +269,8 @@ export default function App() {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
   }, [agentMessages])
 
-  // WebSocket message handler
-  const handleWSMessage = useCallback((event: MessageEvent) => {
-    const data: WSEvent = JSON.parse(event.data)
+  // Handle a single server event
+  const handleWSEvent = useCallback((data: WSEvent) => {
     console.log('[UI] Received WS message type:', JSON.stringify(data.type), 'data:', data.data)
     const timestamp = new Date(data.timestamp).toLocaleTimeString()
 
@@ -348,20 +347,27 @@ export default function App() {
         )
         break
 
-      case 'checklist_update':
+      case 'checklist_update': {
         console.log('[UI] Checklist update:', data.data)
-        if (data.data.checklist) {
-          // Use repo from event if available, otherwise fall back
-          const repo = (data.data.repo as string) || activeRepoRef.current || reposRef.current[0]?.name
-          if (repo) {
-            console.log('[UI] Updating checklist for repo:', repo)
-            setRepoChecklists((prev) => ({
+        // Delta: apply the one item's status to this repo's checklist
+        const item = data.data.item as string
+        // Use repo from event if available, otherwise fall back
+        const repo = (data.data.repo as string) || activeRepoRef.current || reposRef.current[0]?.name
+        if (repo && item) {
+          console.log('[UI] Updating checklist for repo:', repo)
+          setRepoChecklists((prev) => {
+            const checklist = prev[repo] || getDefaultChecklist()
+            return {
               ...prev,
-              [repo]: data.data.checklist as Record<string, ChecklistItem>,
-            }))
-          }
+              [repo]: {
+                ...checklist,
+                [item]: { ...checklist[item], status: data.data.status as ChecklistItem['status'] },
+              },
+            }
+          })
         }
         break
+      }
 
       case 'repo_start':
         console.log('[UI] Repo start:', data.data.repo)
@@ -371,11 +377,6 @@ export default function App() {
             r.name === data.data.repo ? { ...r, status: 'running' } : r
           )
         )
-        // Reset checklist for this repo
-        setRepoChecklists((prev) => ({
-          ...prev,
-          [data.data.repo as string]: getDefaultChecklist(),
-        }))
         break
 
       case 'repo_complete':
@@ -440,6 +441,14 @@ export default function App() {
   // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [])
 
+  // WebSocket message handler - a frame carries one event or a batch (array)
+  const handleWSMessage = useCallback((event: MessageEvent) => {
+    const parsed: WSEvent | WSEvent[] = JSON.parse(event.data)
+    for (const data of Array.isArray(parsed) ? parsed : [parsed]) {
+      handleWSEvent(data)
+    }
+  }, [handleWSEvent])
+
   // Connect WebSocket
   const reconnectTimeoutRef = useRef<number | null>(null)
   const isClosingRef = useRef(false)
@@ -564,7 +573,7 @@ export default function App() {
   }
 
   const refreshStatus = () => {
-    fetch('/api/status')
+    fetch('/api/status?refresh=true')
       .then((res) => res.json())
       .then(setStatus)
       .catch(console.error)